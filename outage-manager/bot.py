@@ -17,6 +17,7 @@ from aiogram.filters.command import Command
 from aiogram import F
 
 from parser import get_current_status, get_outages, Outage
+from fetcher import FetchError
 from messages import Messages
 from emoji import EmojiStatus
 from utils import timedelta_to_str
@@ -223,7 +224,11 @@ class StateManager:
         self.current_outages: List[Outage] = []
 
     async def update(self):
-        outages = await get_outages()
+        try:
+            outages = await get_outages()
+        except FetchError as e:
+            logging.error(f"Failed to fetch outages, keeping the previous schedule: {e}")
+            return
         logging.info(f"Outages: {outages}")
         if self.current_outages != outages:
             logging.info(f"Outages have changed: {outages}")
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+#
+import math
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Deque, Generic, List, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+Fetch = Callable[[str], Awaitable[str]]
+
+
+class FetchError(Exception):
+    pass
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    ordered = sorted(values)
+    rank = max(math.ceil(q * len(ordered)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+@dataclass
+class SourceStats:
+    window: int = 50
+    # (latency, measured); unmeasured samples are lower bounds from cut off requests
+    samples: Deque[Tuple[float, bool]] = field(init=False)
+    outcomes: Deque[bool] = field(init=False)
+
+    def __post_init__(self):
+        self.samples = deque(maxlen=self.window)
+        self.outcomes = deque(maxlen=self.window)
+
+    def record(self, latency: float, success: bool) -> None:
+        self.outcomes.append(success)
+        if success:
+            self.samples.append((latency, True))
+
+    def record_cancelled(self, elapsed: float) -> None:
+        # Cut off after it was already overdue: a failure that would have taken
+        # at least `elapsed`
+        self.outcomes.append(False)
+        self.samples.append((elapsed, False))
+
+    @property
+    def latencies(self) -> List[float]:
+        return [latency for latency, measured in self.samples if measured]
+
+    @property
+    def success_rate(self) -> float:
+        if not self.outcomes:
+            return 1.0
+        return sum(self.outcomes) / len(self.outcomes)
+
+    def latency(self, q: float, lower_bounds: bool = True) -> float | None:
+        values = [latency for latency, measured in self.samples if measured or lower_bounds]
+        if not values:
+            return None
+        return percentile(values, q)
+
+
+@dataclass
+class Source(Generic[T]):
+    name: str
+    url: str
+    parse: Callable[[str], T]
+    fetch: Fetch
+    stats: SourceStats = field(default_factory=SourceStats)
+
+
+class HedgedFetcher(Generic[T]):
+    """Fetches from the best known source and hedges to the next one when it is slow.
+
+    The primary is the source with the best recent success rate (ties broken by
+    median latency). If it has not answered within `hedge_percentile` of its own
+    measured latency (capped at `default_hedge_delay`), the next source is
+    requested as well; the first response that parses wins and the rest are
+    cancelled. A failed request fails over to the next source immediately.
+    A request cut off after its hedge delay has passed, whether it lost the race
+    or hit the deadline, counts as a failure, so a primary that hangs loses its
+    slot on the next fetch.
+    """
+
+    def __init__(self,
+                 sources: Sequence[Source[T]],
+                 hedge_percentile: float = 0.95,
+                 default_hedge_delay: float = 5.0,
+                 min_samples: int = 5,
+                 timeout: float = 60.0):
+        if not sources:
+            raise ValueError("At least one source is required")
+        self.sources = list(sources)
+        self.hedge_percentile = hedge_percentile
+        self.default_hedge_delay = default_hedge_delay
+        self.min_samples = min_samples
+        self.timeout = timeout
+
+    def hedge_delay(self, source: Source[T]) -> float:
+        if len(source.stats.latencies) < self.min_samples:
+            return self.default_hedge_delay
+        delay = source.stats.latency(self.hedge_percentile, lower_bounds=False)
+        return min(delay or self.default_hedge_delay, self.default_hedge_delay)
+
+    def ranked_sources(self) -> List[Source[T]]:
+        def key(source: Source[T]):
+            median = source.stats.latency(0.5)
+            return (-source.stats.success_rate,
+                    median if median is not None else self.default_hedge_delay)
+        return sorted(self.sources, key=key)
+
+    async def _fetch_one(self, source: Source[T]) -> T:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            html = await source.fetch(source.url)
+            result = source.parse(html)
+        except Exception as e:
+            source.stats.record(loop.time() - started, success=False)
+            logging.warning(f"Source {source.name} failed: {e!r}")
+            raise
+        latency = loop.time() - started
+        source.stats.record(latency, success=True)
+        logging.debug(f"Source {source.name} answered in {latency:.2f}s")
+        return result
+
+    async def fetch(self) -> T:
+        loop = asyncio.get_running_loop()
+        sources = self.ranked_sources()
+        deadline = loop.time() + self.timeout
+        pending: set[asyncio.Task] = set()
+        task_sources: dict[asyncio.Task, Source[T]] = {}
+        task_started: dict[asyncio.Task, float] = {}
+        task_hedge_at: dict[asyncio.Task, float] = {}
+        errors: List[str] = []
+        next_index = 0
+        hedge_at = deadline
+        timed_out = False
+        settled = False
+
+        def launch() -> None:
+            nonlocal next_index, hedge_at
+            source = sources[next_index]
+            next_index += 1
+            task = asyncio.create_task(self._fetch_one(source))
+            pending.add(task)
+            task_sources[task] = source
+            task_started[task] = loop.time()
+            task_hedge_at[task] = hedge_at = task_started[task] + self.hedge_delay(source)
+
+        launch()
+        try:
+            while pending:
+                now = loop.time()
+                if now >= deadline:
+                    errors.append(f"timed out after {self.timeout}s")
+                    timed_out = settled = True
+                    break
+                wait_until = min(deadline, hedge_at) if next_index < len(sources) else deadline
+                done, pending = await asyncio.wait(pending,
+                                                   timeout=max(wait_until - now, 0),
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        logging.info(f"Using result from {task_sources[task].name}")
+                        settled = True
+                        return task.result()
+                    errors.append(f"{task_sources[task].name}: {task.exception()!r}")
+                if next_index < len(sources) and (done or loop.time() >= hedge_at):
+                    if not done:
+                        logging.info(f"Hedging with {sources[next_index].name}")
+                    launch()
+            raise FetchError("All sources failed: " + "; ".join(errors))
+        finally:
+            now = loop.time()
+            for task in pending:
+                task.cancel()
+                # A hedge cancelled within its own expected latency says nothing
+                # about the source, nor does a request dropped because the caller
+                # itself was cancelled
+                if settled and (timed_out or now >= task_hedge_at[task]):
+                    task_sources[task].stats.record_cancelled(now - task_started[task])
+            await asyncio.gather(*pending, return_exceptions=True)
@@ -14,8 +14,11 @@ from dataclasses import dataclass
 from emoji import EmojiStatus
 from utils import timedelta_to_str
 from messages import Messages
+from fetcher import HedgedFetcher, Source
 
+GROUP = 8
 URL = "https://energy-ua.info/grafik/%D0%9F%D0%BE%D0%BB%D1%82%D0%B0%D0%B2%D0%B0/%D0%93%D0%B5%D1%82%D1%8C%D0%BC%D0%B0%D0%BD%D0%B0+%D0%A1%D0%B0%D0%B3%D0%B0%D0%B9%D0%B4%D0%B0%D1%87%D0%BD%D0%BE%D0%B3%D0%BE/8"
+REQUEST_TIMEOUT = 30 # seconds
 
 color_to_message = {
     'red': Messages.OUTAGE_INFO,
@@ -78,7 +81,7 @@ headers = {
 }
 
 async def get_content_with_httpx(url: str = URL) -> str:
-    async with httpx.AsyncClient() as client:
+    async with httpx.AsyncClient(timeout=REQUEST_TIMEOUT) as client:
         response = await client.get(url, headers=headers)
         response.raise_for_status()
         return response.text
@@ -87,20 +90,16 @@ async def get_content_with_httpx(url: str = URL) -> str:
 async def get_content_with_playwright(url: str = URL) -> str:
     async with async_playwright() as p:
         browser = await p.chromium.launch()
-        page = await browser.new_page()
-        await page.goto(url)
-        html = await page.content()
-        await browser.close()
-        return html
+        try:
+            page = await browser.new_page()
+            await page.goto(url, timeout=REQUEST_TIMEOUT * 1000)
+            return await page.content()
+        finally:
+            await browser.close()
 
 
-async def get_page_content(url: str = URL, fn=get_content_with_playwright) -> str:
-    response = await fn(url)
-    return response
-
-async def get_outages():
+def parse_energy_ua(html_content: str) -> list[Outage]:
     result = []
-    html_content = await get_page_content(URL)
     today_schedule_container, tomorrow_schedule_container = etree.HTML(html_content).xpath("//div[@class='grafik_string']")
     current_datetime = datetime.now().date()
     tomorrow_datetime = current_datetime + timedelta(days=1)
@@ -126,6 +125,26 @@ async def get_outages():
             )
     return result
 
+# Equivalent schedule sources per group, each with its own parser adapter.
+# The fetcher picks the healthiest one as primary and hedges to the others.
+# Single-origin for now: no other source for the schedule is known yet, so
+# hedging only kicks in once one with a different origin is added here.
+SOURCES: dict[int, list[Source[list[Outage]]]] = {
+    GROUP: [
+        Source(name="energy-ua", url=URL, parse=parse_energy_ua, fetch=get_content_with_playwright),
+    ],
+}
+
+fetchers: dict[int, HedgedFetcher[list[Outage]]] = {}
+
+def get_fetcher(group: int = GROUP) -> HedgedFetcher[list[Outage]]:
+    if group not in fetchers:
+        fetchers[group] = HedgedFetcher(SOURCES[group], timeout=REQUEST_TIMEOUT * 2)
+    return fetchers[group]
+
+async def get_outages(group: int = GROUP) -> list[Outage]:
+    return await get_fetcher(group).fetch()
+
 @dataclass
 class EnergyState:
     status: OutageStatus
@@ -0,0 +1,191 @@
+import os
+import sys
+import asyncio
+import unittest
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "outage-manager"))
+
+from fetcher import FetchError, HedgedFetcher, Source
+
+
+class StubServer:
+    """Local HTTP server answering every request with `body` after `delay` seconds."""
+
+    def __init__(self, body: str = "ok", delay: float = 0.0, status: int = 200):
+        self.body = body
+        self.delay = delay
+        self.status = status
+        self.requests = 0
+        self.server: asyncio.Server | None = None
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/"
+
+    async def stop(self) -> None:
+        assert self.server is not None
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.requests += 1
+        await reader.readuntil(b"\r\n\r\n")
+        await asyncio.sleep(self.delay)
+        body = self.body.encode()
+        writer.write(f"HTTP/1.1 {self.status} Stub\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+
+class Client:
+    """Minimal cancellable HTTP GET that remembers which of its requests were cancelled."""
+
+    def __init__(self):
+        self.cancelled: list[str] = []
+
+    async def get(self, url: str) -> str:
+        parts = urlsplit(url)
+        reader, writer = await asyncio.open_connection(parts.hostname, parts.port)
+        try:
+            writer.write(f"GET {parts.path} HTTP/1.1\r\nHost: {parts.netloc}\r\nConnection: close\r\n\r\n".encode())
+            await writer.drain()
+            head, _, body = (await reader.read()).partition(b"\r\n\r\n")
+        except asyncio.CancelledError:
+            self.cancelled.append(url)
+            raise
+        finally:
+            writer.close()
+        status = int(head.split(b" ")[1])
+        if status != 200:
+            raise RuntimeError(f"HTTP {status}")
+        return body.decode()
+
+
+class HedgedFetcherTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.client = Client()
+        self.servers: list[StubServer] = []
+
+    async def asyncTearDown(self):
+        for server in self.servers:
+            await server.stop()
+
+    async def source(self, name: str, parse=str, **kwargs) -> tuple[Source[str], StubServer]:
+        server = StubServer(**kwargs)
+        self.servers.append(server)
+        url = await server.start()
+        return Source(name=name, url=url, parse=parse, fetch=self.client.get), server
+
+    async def test_slow_primary_is_hedged_and_cancelled(self):
+        slow, slow_server = await self.source("slow", body="slow", delay=2.0)
+        fast, _ = await self.source("fast", body="fast", delay=0.05)
+        fetcher = HedgedFetcher([slow, fast], default_hedge_delay=0.2)
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        self.assertEqual(await fetcher.fetch(), "fast")
+        self.assertLess(loop.time() - started, 1.0)
+        self.assertEqual(self.client.cancelled, [slow.url])
+        self.assertEqual(slow_server.requests, 1)
+        # Cut off after its hedge delay: a failure with a lower bound on latency
+        # that stays out of its measured latencies
+        self.assertEqual(list(slow.stats.outcomes), [False])
+        self.assertEqual(slow.stats.latencies, [])
+        self.assertGreaterEqual(slow.stats.latency(0.5), 0.2)
+
+    async def test_hedge_within_expected_latency_is_not_penalised(self):
+        primary, _ = await self.source("primary", body="primary", delay=0.3)
+        hedge, _ = await self.source("hedge", body="hedge", delay=2.0)
+        fetcher = HedgedFetcher([primary, hedge], default_hedge_delay=0.2)
+
+        self.assertEqual(await fetcher.fetch(), "primary")
+        self.assertEqual(self.client.cancelled, [hedge.url])
+        self.assertEqual(list(hedge.stats.outcomes), [])
+        self.assertEqual(list(hedge.stats.samples), [])
+
+    async def test_fast_failure_fails_over_immediately(self):
+        broken, _ = await self.source("broken", status=500)
+        fast, _ = await self.source("fast", body="fast")
+        fetcher = HedgedFetcher([broken, fast], default_hedge_delay=5.0)
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        self.assertEqual(await fetcher.fetch(), "fast")
+        self.assertLess(loop.time() - started, 1.0)
+        self.assertEqual(list(broken.stats.outcomes), [False])
+        self.assertEqual([source.name for source in fetcher.ranked_sources()], ["fast", "broken"])
+
+    async def test_parse_error_counts_as_failure(self):
+        def parse(html: str) -> str:
+            raise ValueError("layout changed")
+
+        unparsable, _ = await self.source("unparsable", parse=parse)
+        fast, _ = await self.source("fast", body="fast")
+        fetcher = HedgedFetcher([unparsable, fast])
+
+        self.assertEqual(await fetcher.fetch(), "fast")
+        self.assertEqual(list(unparsable.stats.outcomes), [False])
+
+    async def test_deadline_raises_fetch_error(self):
+        hanging, _ = await self.source("hanging", delay=5.0)
+        fetcher = HedgedFetcher([hanging], timeout=0.3)
+
+        with self.assertRaises(FetchError):
+            await fetcher.fetch()
+        self.assertEqual(self.client.cancelled, [hanging.url])
+        self.assertEqual(list(hanging.stats.outcomes), [False])
+        self.assertGreaterEqual(hanging.stats.latency(0.5), 0.3)
+
+    async def test_all_sources_failing_raises_fetch_error(self):
+        first, _ = await self.source("first", status=500)
+        second, _ = await self.source("second", status=503)
+        fetcher = HedgedFetcher([first, second])
+
+        with self.assertRaisesRegex(FetchError, "first.*second"):
+            await fetcher.fetch()
+
+    async def test_hung_primary_is_demoted(self):
+        a, a_server = await self.source("a", body="a", delay=0.01)
+        b, b_server = await self.source("b", body="b", delay=0.02)
+
+        # Build a realistic history: both healthy, the backup failed once
+        for source in (a, b):
+            for _ in range(20):
+                await HedgedFetcher([source]).fetch()
+        b_server.status = 500
+        with self.assertRaises(FetchError):
+            await HedgedFetcher([b]).fetch()
+        b_server.status = 200
+
+        fetcher = HedgedFetcher([a, b], default_hedge_delay=0.3)
+        self.assertEqual([source.name for source in fetcher.ranked_sources()], ["a", "b"])
+        a_hedge_delay = fetcher.hedge_delay(a)
+
+        a_server.delay = 5.0
+        loop = asyncio.get_running_loop()
+        for _ in range(12):
+            started = loop.time()
+            self.assertEqual(await fetcher.fetch(), "b")
+            self.assertLess(loop.time() - started, fetcher.default_hedge_delay)
+            self.assertEqual([source.name for source in fetcher.ranked_sources()], ["b", "a"])
+            # Lower bounds from the hung source do not inflate its hedge delay
+            self.assertEqual(fetcher.hedge_delay(a), a_hedge_delay)
+            self.assertLessEqual(fetcher.hedge_delay(b), fetcher.default_hedge_delay)
+        self.assertIn(False, a.stats.outcomes)
+
+    async def test_hedge_delay_is_capped(self):
+        slow, _ = await self.source("slow", delay=0.2)
+        fetcher = HedgedFetcher([slow], default_hedge_delay=0.1)
+
+        for _ in range(5):
+            await fetcher.fetch()
+        self.assertGreaterEqual(slow.stats.latency(0.95), 0.2)
+        self.assertEqual(fetcher.hedge_delay(slow), 0.1)
+
+
+if __name__ == "__main__":
+    unittest.main()